@@ -1,4 +1,4 @@
-from flowmium._flow import Flow, FlowContext
+from flowmium._flow import Flow, FlowContext, ArgDoesNotExist
 from flowmium import serializers
 
-__all__ = ["Flow", "FlowContext", "serializers"]
+__all__ = ["Flow", "FlowContext", "ArgDoesNotExist", "serializers"]
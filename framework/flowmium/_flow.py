@@ -1,16 +1,26 @@
 import os
-import inspect
-import json
-from urllib.parse import urljoin
+import sys
+import types
+import functools
 import argparse
-from typing import Callable, Any
+from typing import (
+    Callable,
+    Any,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 from dataclasses import dataclass
-from flowmium import serializers
+from flowmium import serializers, _json
 from flowmium.serializers import Serializer
 
 
 @dataclass
 class Input:
+    __slots__ = ("arg_name", "depends", "frm", "path", "load")
+
     arg_name: str
     depends: str
     frm: str
@@ -20,6 +30,8 @@ class Input:
 
 @dataclass
 class Output:
+    __slots__ = ("name", "path", "dump")
+
     name: str
     path: str
     dump: Callable[[Any, str], None]
@@ -27,17 +39,53 @@ class Output:
 
 @dataclass
 class Task:
+    __slots__ = ("name", "func", "inputs", "output", "args", "kwargs", "flowctx_kwarg")
+
     name: str
     func: Callable
     inputs: list[Input]
     output: Output
-    requires_flowctx: bool
+    args: tuple[Optional[Input], ...]
+    kwargs: tuple[Input, ...]
+    flowctx_kwarg: bool
 
 
 @dataclass
 class FlowContext:
+    """
+    Context passed to tasks that take a :code:`flowctx` argument.
+
+    Args:
+        task_id: Index of the task in the flow. It is also available as a string
+            in :code:`task_id_str`, use it instead of calling :code:`str()` on :code:`task_id`.
+    """
+
+    __slots__ = ("task_id", "task_id_str")
+
     task_id: int
 
+    def __post_init__(self) -> None:
+        self.task_id_str = sys.intern(str(self.task_id))
+
+
+_MSGPACK_SCALAR_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+_MSGPACK_CONTAINER_TYPES = (list, dict)
+_UNION_TYPES = (Union, getattr(types, "UnionType", Union))
+
+
+def _is_msgpack_native(annotation: Any) -> bool:
+    # Containers are native only if their items are, bare list or dict could hold anything
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+
+    if origin in _UNION_TYPES:
+        return all(_is_msgpack_native(arg) for arg in args)
+
+    if origin in _MSGPACK_CONTAINER_TYPES:
+        return bool(args) and all(_is_msgpack_native(arg) for arg in args)
+
+    return isinstance(annotation, type) and annotation in _MSGPACK_SCALAR_TYPES
+
 
 class ArgDoesNotExist(Exception):
     def __init__(self, arg_name: str) -> None:
@@ -63,19 +111,27 @@ class Flow:
         self.tasks: list[Task] = []
         self.name = name
         self.serializers: dict[str, Serializer] = {}
+        self._dag_dicts: dict[tuple[Any, ...], dict[str, Any]] = {}
+
+        # Per task columns aligned with self.tasks, copied into new dicts by get_dag_dict
+        self._task_names: list[str] = []
+        self._task_depends: list[list[str]] = []
+        self._task_id_envs: list[dict[str, str]] = []
+        self._task_inputs: list[list[dict[str, str]]] = []
+        self._task_outputs: list[list[dict[str, str]]] = []
 
     @staticmethod
     def _get_task_name(task_func: Callable) -> str:
-        return task_func.__name__.replace("_", "-")
+        return sys.intern(task_func.__name__.replace("_", "-"))
 
     def _parse_inputs_dict_tuple(
         self,
-        arg_names_list: list[str],
+        arg_names_set: frozenset[str],
         input_dict_tuple: tuple[str, Callable],
     ) -> Input:
         arg_name, inp_task_func = input_dict_tuple
 
-        if arg_name not in arg_names_list:
+        if arg_name not in arg_names_set:
             raise ArgDoesNotExist(arg_name=arg_name)
 
         input_task_name = Flow._get_task_name(inp_task_func)
@@ -85,24 +141,62 @@ class Flow:
         return Input(
             depends=input_task_name,
             arg_name=arg_name,
-            frm=Flow.OUTPUT_NAME_TEMPLATE.format(input_task_name, input_file_ext),
-            path=Flow.INPUT_PATH_TEMPLATE.format(arg_name, input_file_ext),
+            frm=sys.intern(
+                Flow.OUTPUT_NAME_TEMPLATE.format(input_task_name, input_file_ext)
+            ),
+            path=sys.intern(Flow.INPUT_PATH_TEMPLATE.format(arg_name, input_file_ext)),
             load=self.serializers[input_task_name].load,
         )
 
     @staticmethod
-    def _get_arg_names_list(task_func: Callable) -> tuple[list[str], bool]:
-        arg_names_list = inspect.getfullargspec(task_func).args
-        arg_names_list_no_flowctx = list(
-            filter(lambda item: item != "flowctx", arg_names_list)
-        )
+    @functools.lru_cache(maxsize=None)
+    def _get_arg_names_list(task_func: Callable) -> tuple[str, ...]:
+        func: Any = task_func
+
+        while hasattr(func, "__wrapped__"):
+            func = func.__wrapped__
 
-        return arg_names_list_no_flowctx, "flowctx" in arg_names_list
+        arg_count = func.__code__.co_argcount
+
+        return func.__code__.co_varnames[:arg_count]
+
+    @staticmethod
+    def _get_call_args(
+        arg_names_list: tuple[str, ...], task_inputs: list[Input]
+    ) -> tuple[tuple[Optional[Input], ...], tuple[Input, ...], bool]:
+        # Inputs are passed positionally up to the first argument that is not provided,
+        # the rest are passed as keyword arguments. None marks the position of flowctx.
+        inputs_by_arg_name = {inp.arg_name: inp for inp in task_inputs}
+        args: list[Optional[Input]] = []
+        flowctx_kwarg = False
+
+        for index, arg_name in enumerate(arg_names_list):
+            if arg_name == "flowctx":
+                args.append(None)
+            elif arg_name in inputs_by_arg_name:
+                args.append(inputs_by_arg_name.pop(arg_name))
+            else:
+                flowctx_kwarg = "flowctx" in arg_names_list[index:]
+                break
+
+        return tuple(args), tuple(inputs_by_arg_name.values()), flowctx_kwarg
+
+    @staticmethod
+    def _get_default_serializer(task_func: Callable) -> Serializer:
+        try:
+            type_hints = get_type_hints(task_func)
+        except (NameError, TypeError):
+            return serializers.pkl
+
+        if "return" in type_hints and _is_msgpack_native(type_hints["return"]):
+            return serializers.msgpack_bin
+
+        return serializers.pkl
 
     def task(
         self,
         inputs: dict[str, Callable] = {},
-        serializer: Serializer = serializers.pkl,
+        serializer: Optional[Serializer] = None,
     ) -> Callable:
         """
         Decorator to register a function as a task in the flow by marking them as :code:`@flow.task`
@@ -118,38 +212,69 @@ class Flow:
                 To pass the return output of one task to another, the orchestrator serializes the
                 output and uploads it to s3 like storage (like MinIO). This argument accepts the
                 serializer to be used for the output of the task.
-                The default serializer is pickle. There are other serializers available and you can
-                also define your own. See :ref:`serializers` section for more details.
+                If not given, msgpack is used when the return type of the function is annotated
+                as :code:`str`, :code:`int`, :code:`float`, :code:`bool`, :code:`bytes`,
+                :code:`None`, or a :code:`list` or :code:`dict` with items of those types
+                (for example :code:`dict[str, list[int]]`), and pickle is used otherwise.
+                There are other serializers available and you can also define your own.
+                See :ref:`serializers` section for more details.
         """
 
         def task_decorator(task_func: Callable) -> Callable:
             task_name = Flow._get_task_name(task_func)
-            self.serializers[task_name] = serializer
+            task_serializer = (
+                serializer
+                if serializer is not None
+                else Flow._get_default_serializer(task_func)
+            )
+            self.serializers[task_name] = task_serializer
 
             task_output = Output(
-                name=Flow.OUTPUT_NAME_TEMPLATE.format(task_name, serializer.ext),
-                path=Flow.OUTPUT_PATH_TEMPLATE.format(task_name, serializer.ext),
-                dump=serializer.dump,
+                name=sys.intern(
+                    Flow.OUTPUT_NAME_TEMPLATE.format(task_name, task_serializer.ext)
+                ),
+                path=sys.intern(
+                    Flow.OUTPUT_PATH_TEMPLATE.format(task_name, task_serializer.ext)
+                ),
+                dump=task_serializer.dump,
             )
 
-            arg_names_list, requires_flowctx = Flow._get_arg_names_list(
-                task_func=task_func
-            )
+            arg_names_list = Flow._get_arg_names_list(task_func=task_func)
+
+            arg_names_set = frozenset(arg_names_list) - {"flowctx"}
 
             task_inputs = [
-                self._parse_inputs_dict_tuple(arg_names_list, item)
+                self._parse_inputs_dict_tuple(arg_names_set, item)
                 for item in inputs.items()
             ]
 
+            args, kwargs, flowctx_kwarg = Flow._get_call_args(
+                arg_names_list, task_inputs
+            )
+
             task_def = Task(
                 name=task_name,
                 func=task_func,
                 inputs=task_inputs,
                 output=task_output,
-                requires_flowctx=requires_flowctx,
+                args=args,
+                kwargs=kwargs,
+                flowctx_kwarg=flowctx_kwarg,
             )
 
+            self._task_names.append(task_name)
+            self._task_depends.append([inp.depends for inp in task_inputs])
+            self._task_id_envs.append(
+                {"name": "FLOWMIUM_FRAMEWORK_TASK_ID", "value": f"{len(self.tasks)}"}
+            )
+            self._task_inputs.append(
+                [{"from": inp.frm, "path": inp.path} for inp in task_inputs]
+            )
+            self._task_outputs.append(
+                [{"name": task_output.name, "path": task_output.path}]
+            )
             self.tasks.append(task_def)
+            self._dag_dicts.clear()
 
             return task_func
 
@@ -158,14 +283,13 @@ class Flow:
     def _run_task(self, flowctx: FlowContext) -> None:
         task_def = self.tasks[flowctx.task_id]
 
-        args_dict = dict(
-            [(inp.arg_name, inp.load(inp.path)) for inp in task_def.inputs]
-        )
+        args = [flowctx if inp is None else inp.load(inp.path) for inp in task_def.args]
+        kwargs = {inp.arg_name: inp.load(inp.path) for inp in task_def.kwargs}
 
-        if task_def.requires_flowctx:
-            args_dict["flowctx"] = flowctx
+        if task_def.flowctx_kwarg:
+            kwargs["flowctx"] = flowctx
 
-        task_output = task_def.func(**args_dict)
+        task_output = task_def.func(*args, **kwargs)
 
         if task_output is not None:
             task_def.output.dump(task_output, task_def.output.path)
@@ -175,6 +299,8 @@ class Flow:
     ) -> dict[str, Any]:
         """
         Construct the flow definition that will be submitted to the orchestrator.
+        The definition is cached for the given arguments and shared between calls, so it
+        should not be modified.
 
         Args:
             image: All python flows (packages and modules that call :code:`flow.run()` when
@@ -190,37 +316,46 @@ class Flow:
                 variables for the task. The key is the name of the environment variable for the
                 task and the value if the name of the secret registered in the orchestrator.
         """
-        tasks: list[dict[str, Any]] = []
-
-        for task_id, task in enumerate(self.tasks):
-            tasks.append(
-                {
-                    "name": task.name,
-                    "image": image,
-                    "depends": [inp.depends for inp in task.inputs],
-                    "cmd": cmd,
-                    "env": [
-                        {
-                            "name": "FLOWMIUM_FRAMEWORK_TASK_ID",
-                            "value": f"{task_id}",
-                        },
-                    ]
-                    + [
-                        {"name": env_name, "fromSecret": secret_name}
-                        for env_name, secret_name in secrets_refs.items()
-                    ],
-                    "inputs": [
-                        {"from": inp.frm, "path": inp.path} for inp in task.inputs
-                    ],
-                    "outputs": [{"name": task.output.name, "path": task.output.path}],
-                }
+        dag_key = (image, tuple(cmd), tuple(secrets_refs.items()))
+
+        if dag_key in self._dag_dicts:
+            return self._dag_dicts[dag_key]
+
+        cmd = list(cmd)
+
+        secrets_env = [
+            {"name": env_name, "fromSecret": secret_name}
+            for env_name, secret_name in secrets_refs.items()
+        ]
+
+        tasks = [
+            {
+                "name": task_name,
+                "image": image,
+                "depends": list(depends),
+                "cmd": cmd,
+                "env": [task_id_env.copy(), *secrets_env],
+                "inputs": [inp.copy() for inp in inputs],
+                "outputs": [out.copy() for out in outputs],
+            }
+            for task_name, depends, task_id_env, inputs, outputs in zip(
+                self._task_names,
+                self._task_depends,
+                self._task_id_envs,
+                self._task_inputs,
+                self._task_outputs,
             )
+        ]
 
-        return {
+        dag = {
             "name": self.name,
             "tasks": tasks,
         }
 
+        self._dag_dicts[dag_key] = dag
+
+        return dag
+
     def run(self, secrets_refs: dict[str, str] = {}) -> None:
         """
         Runs the flow. Your module or package should call this function when executed
@@ -233,19 +368,18 @@ class Flow:
                 task and the value if the name of the secret registered in the orchestrator.
         """
 
-        task_id = os.getenv("FLOWMIUM_FRAMEWORK_TASK_ID", default=None)
+        task_id = os.environ.get("FLOWMIUM_FRAMEWORK_TASK_ID")
 
         if task_id is not None:
-            flowctx = FlowContext(
-                task_id=int(os.environ["FLOWMIUM_FRAMEWORK_TASK_ID"]),
-            )
+            flowctx = FlowContext(task_id=int(task_id))
 
             self._run_task(flowctx)
         else:
             self._submit_flow(secrets_refs)
 
     def _submit_flow(self, secrets_refs: dict[str, str] = {}) -> None:
-        import requests
+        import urllib.request
+        import urllib.error
 
         parser = argparse.ArgumentParser()
         parser.add_argument("--cmd", required=True, type=str)
@@ -261,15 +395,23 @@ class Flow:
         dag = self.get_dag_dict(args.image, args.cmd.split(" "), secrets_refs)
 
         if args.dry_run:
-            print(json.dumps(dag, indent=4))
+            print(_json.dumps(dag, indent=True).decode())
             return
 
-        resp = requests.post(
-            urljoin(args.flowmium_server, "/api/v1/job"),
-            json=dag,
+        req = urllib.request.Request(
+            args.flowmium_server.rstrip("/") + "/api/v1/job",
+            data=_json.dumps(dag),
+            headers={"Content-Type": "application/json"},
+            method="POST",
         )
 
-        if resp.status_code != 200:
-            print(resp.status_code)
-            print(resp.text)
+        try:
+            with urllib.request.urlopen(req) as resp:
+                status_code, resp_body = resp.status, resp.read()
+        except urllib.error.HTTPError as error:
+            status_code, resp_body = error.code, error.read()
+
+        if status_code != 200:
+            print(status_code)
+            print(resp_body.decode(errors="replace"))
             exit(1)
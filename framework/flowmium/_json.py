@@ -0,0 +1,13 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+
+except ImportError:
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None).encode()
@@ -12,20 +12,76 @@ Contains built in serializers
 .. data:: json_text
 
     Uses the :code:`json` module to serialize data to json string.
+
+.. data:: msgpack_bin
+
+    Uses msgpack to serialize data to a compact binary format. Values that msgpack cannot
+    represent natively (tuples, sets, custom classes etc.) are pickled and embedded as
+    msgpack extension types. This is the default serializer for tasks annotated to return
+    msgpack compatible types.
+
+.. data:: pkl_oob
+
+    Uses python pickle protocol 5 and writes large buffers, like the data of numpy arrays,
+    out-of-band next to the pickle stream instead of copying them into it. The file is memory
+    mapped on load so those buffers are not copied again. Useful for array heavy outputs.
+
+.. data:: arrow
+
+    Uses the Arrow IPC file format to serialize :code:`pyarrow.Table` or :code:`pandas.DataFrame`
+    outputs. The file is memory mapped on load and tables are returned as :code:`pyarrow.Table`
+    without copying their column buffers. Data frames are converted back to
+    :code:`pandas.DataFrame`, which copies the columns.
+    Requires :code:`pyarrow` to be installed, for example with :code:`pip install flowmium[arrow]`.
+
+.. data:: pkl_lz4
+
+    Same as :code:`pkl` but compresses the pickle with LZ4, for large compressible outputs
+    that are slow to transfer between tasks. Requires :code:`lz4` to be installed, for example
+    with :code:`pip install flowmium[lz4]`.
 """
 
+import io
+import os
+import locale
 import pickle
 import json
-from typing import Any, Callable, IO
-from pathlib import Path
+import mmap
+import threading
+import msgpack
+from typing import Any, Callable, IO, Optional
 
 from dataclasses import dataclass
 
 
-__all__ = ["pkl", "plain_text", "json_text"]
+__all__ = [
+    "pkl",
+    "plain_text",
+    "json_text",
+    "msgpack_bin",
+    "pkl_oob",
+    "arrow",
+    "pkl_lz4",
+]
+
+
+_WRITE_BUFFER_SIZE = 1 << 20
+_READ_BUFFER_SIZE = 1 << 20
+
+_TEXT_ENCODING = locale.getpreferredencoding(False)
+_REUSED_BUFFER_SIZE = 128 * 1024
+_MMAP_THRESHOLD = 4 << 20
+_reused_buffers = threading.local()
+
+
+def _make_parent_dirs(path: str) -> None:
+    parent = os.path.dirname(path)
+
+    if parent:
+        os.makedirs(parent, exist_ok=True)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Serializer:
     """
     Define a custom serializer
@@ -42,6 +98,8 @@ class Serializer:
             or :code:`'r'`.
     """
 
+    __slots__ = ("dump_func", "load_func", "ext", "write_mode", "read_mode")
+
     dump_func: Callable[[Any, IO[Any]], Any]
     load_func: Callable[[IO[Any]], Any]
     ext: str
@@ -49,36 +107,266 @@ class Serializer:
     read_mode: str
 
     def dump(self, obj: Any, path: str) -> None:
-        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        _make_parent_dirs(path)
 
-        with open(path, self.write_mode) as output_file:
+        with open(path, self.write_mode, buffering=_WRITE_BUFFER_SIZE) as output_file:
             self.dump_func(obj, output_file)
 
     def load(self, path: str) -> Any:
-        with open(path, self.read_mode) as output_file:
+        with open(path, self.read_mode, buffering=_READ_BUFFER_SIZE) as output_file:
             return self.load_func(output_file)
 
 
-pkl = Serializer(
-    dump_func=pickle.dump,
+@dataclass(frozen=True)
+class _BytesSerializer(Serializer):
+    # Serializer whose output is a single bytes object, written with os.write instead of
+    # going through a python file object. If loads_func is set, the file is read unbuffered
+    # and decoded with it instead of load_func.
+    __slots__ = ("dumps_func", "loads_func")
+
+    dumps_func: Callable[[Any], Any]
+    loads_func: Optional[Callable[[Any], Any]]
+
+    def dump(self, obj: Any, path: str) -> None:
+        _make_parent_dirs(path)
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+
+        try:
+            with memoryview(self.dumps_func(obj)) as view:
+                written = os.write(fd, view)
+
+                while written < len(view):
+                    remaining = view[written:]
+                    written += os.write(fd, remaining)
+        finally:
+            os.close(fd)
+
+    def load(self, path: str) -> Any:
+        if self.loads_func is None:
+            return super().load(path)
+
+        with open(path, "rb", buffering=0) as input_file:
+            return _read_and_load(input_file, self.loads_func)
+
+
+def _read_and_load(fp: io.FileIO, loads: Callable[[Any], Any]) -> Any:
+    # Large files are memory mapped, small files are read into a per thread buffer and
+    # the rest are read with a single read of the known size. loads must not keep
+    # references to the data it is given.
+    size = os.fstat(fp.fileno()).st_size
+
+    if size >= _MMAP_THRESHOLD:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as data:
+                return loads(data)
+
+    if size > _REUSED_BUFFER_SIZE:
+        return loads(fp.read(size))
+
+    buffer = getattr(_reused_buffers, "buffer", None) or bytearray(_REUSED_BUFFER_SIZE)
+
+    # Taken out while in use in case loads ends up loading another file
+    _reused_buffers.buffer = None
+
+    try:
+        with memoryview(buffer) as view:
+            read_size = fp.readinto(view)
+
+            with view[:read_size] as data:
+                return loads(data)
+    finally:
+        _reused_buffers.buffer = buffer
+
+
+def _dumps_pkl(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+pkl = _BytesSerializer(
+    dump_func=lambda obj, fp: fp.write(_dumps_pkl(obj)),
     load_func=pickle.load,
     ext="pkl",
     write_mode="wb",
     read_mode="rb",
+    dumps_func=_dumps_pkl,
+    loads_func=pickle.loads,
 )
 
-plain_text = Serializer(
-    dump_func=lambda obj, fp: fp.write(str(obj)),
-    load_func=lambda fp: fp.read(),
+
+def _dump_plain_text(obj: Any, fp: IO[str]) -> None:
+    fp.write(obj if type(obj) is str else str(obj))
+
+
+def _dumps_plain_text(obj: Any) -> bytes:
+    # Same encoding open() uses for the text mode file in load
+    return (obj if type(obj) is str else str(obj)).encode(_TEXT_ENCODING)
+
+
+def _load_plain_text(fp: IO[str]) -> str:
+    return fp.read()
+
+
+plain_text = _BytesSerializer(
+    dump_func=_dump_plain_text,
+    load_func=_load_plain_text,
     ext="txt",
     write_mode="w",
     read_mode="r",
+    dumps_func=_dumps_plain_text,
+    loads_func=None,
 )
 
-json_text = Serializer(
-    dump_func=json.dump,
-    load_func=json.load,
+
+def _dumps_json(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+json_text = _BytesSerializer(
+    dump_func=lambda obj, fp: fp.write(_dumps_json(obj)),
+    load_func=lambda fp: json.loads(fp.read()),
     ext="json",
-    write_mode="w",
-    read_mode="r",
+    write_mode="wb",
+    read_mode="rb",
+    dumps_func=_dumps_json,
+    loads_func=None,
+)
+
+
+_PICKLE_EXT_TYPE = 1
+
+
+def _msgpack_default(obj: Any) -> msgpack.ExtType:
+    return msgpack.ExtType(
+        _PICKLE_EXT_TYPE, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    )
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _PICKLE_EXT_TYPE:
+        return pickle.loads(data)
+
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_loads(data: Any) -> Any:
+    return msgpack.unpackb(
+        data, raw=False, strict_map_key=False, ext_hook=_msgpack_ext_hook
+    )
+
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(
+        obj, use_bin_type=True, strict_types=True, default=_msgpack_default
+    )
+
+
+msgpack_bin = _BytesSerializer(
+    dump_func=lambda obj, fp: fp.write(_msgpack_dumps(obj)),
+    load_func=lambda fp: _msgpack_loads(fp.read()),
+    ext="msgpack",
+    write_mode="wb",
+    read_mode="rb",
+    dumps_func=_msgpack_dumps,
+    loads_func=_msgpack_loads,
+)
+
+
+_FRAME_LENGTH_SIZE = 8
+
+
+def _write_frame(fp: IO[bytes], data: Any) -> None:
+    with memoryview(data) as view:
+        fp.write(view.nbytes.to_bytes(_FRAME_LENGTH_SIZE, "little"))
+        fp.write(view)
+
+
+def _dump_pkl_oob(obj: Any, fp: IO[bytes]) -> None:
+    buffers: list[pickle.PickleBuffer] = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+    _write_frame(fp, data)
+
+    for buffer in buffers:
+        with buffer.raw() as raw:
+            _write_frame(fp, raw)
+
+
+def _load_pkl_oob(fp: IO[bytes]) -> Any:
+    # Copy on write mapping, buffers handed out to unpickled objects are not copied
+    # but can still be written to
+    view = memoryview(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_COPY))
+
+    frames = []
+    offset = 0
+
+    while offset < len(view):
+        start = offset + _FRAME_LENGTH_SIZE
+        offset = start + int.from_bytes(view[offset:start], "little")
+        frames.append(view[start:offset])
+
+    data, *buffers = frames
+
+    return pickle.loads(data, buffers=buffers)
+
+
+pkl_oob = Serializer(
+    dump_func=_dump_pkl_oob,
+    load_func=_load_pkl_oob,
+    ext="pkl5",
+    write_mode="wb",
+    read_mode="rb",
+)
+
+
+def _dump_arrow(obj: Any, fp: IO[bytes]) -> None:
+    import pyarrow as pa
+
+    table = obj if isinstance(obj, pa.Table) else pa.Table.from_pandas(obj)
+
+    with pa.ipc.new_file(fp, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _load_arrow(fp: IO[bytes]) -> Any:
+    import pyarrow as pa
+
+    source = pa.py_buffer(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+    table = pa.ipc.open_file(source).read_all()
+
+    if table.schema.pandas_metadata is not None:
+        return table.to_pandas()
+
+    return table
+
+
+arrow = Serializer(
+    dump_func=_dump_arrow,
+    load_func=_load_arrow,
+    ext="arrow",
+    write_mode="wb",
+    read_mode="rb",
+)
+
+
+def _dumps_pkl_lz4(obj: Any) -> bytes:
+    import lz4.frame
+
+    return lz4.frame.compress(_dumps_pkl(obj))
+
+
+def _loads_pkl_lz4(data: Any) -> Any:
+    import lz4.frame
+
+    return pickle.loads(lz4.frame.decompress(data))
+
+
+pkl_lz4 = _BytesSerializer(
+    dump_func=lambda obj, fp: fp.write(_dumps_pkl_lz4(obj)),
+    load_func=lambda fp: _loads_pkl_lz4(fp.read()),
+    ext="pkl.lz4",
+    write_mode="wb",
+    read_mode="rb",
+    dumps_func=_dumps_pkl_lz4,
+    loads_func=_loads_pkl_lz4,
 )
@@ -1,3 +1,17 @@
+import functools
+import json
+import shutil
+import sys
+import threading
+import typing
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+
+from flowmium import Flow, FlowContext, ArgDoesNotExist
+from flowmium.serializers import msgpack_bin, pkl, plain_text
 from tests.example_flow import flow
 
 
@@ -91,3 +105,276 @@ def test_dag_yaml() -> None:
         )
         == expected_dag
     )
+
+
+def test_dag_dict_is_cached() -> None:
+    caching_flow = Flow("caching")
+
+    @caching_flow.task()
+    def foo() -> str:
+        return "Hallo world"
+
+    dag = caching_flow.get_dag_dict(
+        "registry:5000/localhost", ["python3", "test.py"], {}
+    )
+
+    assert dag is caching_flow.get_dag_dict(
+        "registry:5000/localhost", ["python3", "test.py"], {}
+    )
+    assert dag is not caching_flow.get_dag_dict(
+        "registry:5000/localhost", ["python3", "other.py"], {}
+    )
+
+    cmd = ["python3", "a.py"]
+    cmd_dag = caching_flow.get_dag_dict("registry:5000/localhost", cmd, {})
+    cmd.append("--x")
+
+    assert cmd_dag["tasks"][0]["cmd"] == ["python3", "a.py"]
+
+    @caching_flow.task({"input_str": foo})
+    def bar(input_str: str) -> str:
+        return input_str
+
+    dag_after_register = caching_flow.get_dag_dict(
+        "registry:5000/localhost", ["python3", "test.py"], {}
+    )
+
+    assert [task["name"] for task in dag_after_register["tasks"]] == ["foo", "bar"]
+
+
+def test_dag_dict_mutation_does_not_leak() -> None:
+    dag = flow.get_dag_dict("registry:5000/mutated", ["python3", "test.py"], {})
+
+    for task in dag["tasks"]:
+        task["depends"].clear()
+        task["env"][0]["value"] = "-1"
+        task["inputs"].clear()
+        task["outputs"][0]["path"] = "changed"
+
+    other_dag = flow.get_dag_dict("registry:5000/other", ["python3", "test.py"], {})
+
+    assert other_dag["tasks"][1]["depends"] == ["foo"]
+    assert other_dag["tasks"][1]["env"][0]["value"] == "1"
+    assert other_dag["tasks"][1]["inputs"] == [
+        {"from": "foo-output.json", "path": "task-inputs-input_str.json"}
+    ]
+    assert (
+        other_dag["tasks"][1]["outputs"][0]["path"]
+        == "task-output-replace-letter-a.txt"
+    )
+
+
+def test_unknown_input_arg_raises() -> None:
+    unknown_arg_flow = Flow("unknown-arg")
+
+    @unknown_arg_flow.task()
+    def foo() -> str:
+        return "Hallo world"
+
+    with pytest.raises(ArgDoesNotExist) as exc_info:
+
+        @unknown_arg_flow.task({"input_string": foo})
+        def bar(input_str: str) -> str:
+            return input_str
+
+    assert exc_info.value.arg_name == "input_string"
+
+
+@pytest.mark.parametrize("status_code", [200, 400])
+def test_submit_flow(
+    status_code: int,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    requests: list[tuple[str, Optional[str], bytes]] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            requests.append((self.path, self.headers["Content-Type"], body))
+
+            self.send_response(status_code)
+            self.end_headers()
+            self.wfile.write(b"job is invalid")
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    monkeypatch.delenv("FLOWMIUM_FRAMEWORK_TASK_ID", raising=False)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "test.py",
+            "--cmd",
+            "python3 test.py",
+            "--image",
+            "registry:5000/localhost",
+            "--flowmium-server",
+            f"http://127.0.0.1:{server.server_port}/",
+        ],
+    )
+
+    try:
+        if status_code == 200:
+            flow.run()
+        else:
+            with pytest.raises(SystemExit) as exc_info:
+                flow.run()
+
+            assert exc_info.value.code == 1
+            assert capsys.readouterr().out == "400\njob is invalid\n"
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+    expected_dag = flow.get_dag_dict(
+        "registry:5000/localhost", ["python3", "test.py"], {}
+    )
+
+    assert len(requests) == 1
+
+    path, content_type, body = requests[0]
+
+    assert path == "/api/v1/job"
+    assert content_type == "application/json"
+    assert json.loads(body) == expected_dag
+
+
+def test_run_tasks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    dag = flow.get_dag_dict("registry:5000/localhost", ["python3", "test.py"], {})
+    output_paths: dict[str, str] = {}
+
+    for task_id, task in enumerate(dag["tasks"]):
+        for inp in task["inputs"]:
+            shutil.copyfile(output_paths[inp["from"]], inp["path"])
+
+        monkeypatch.setenv("FLOWMIUM_FRAMEWORK_TASK_ID", str(task_id))
+        flow.run()
+
+        for out in task["outputs"]:
+            output_paths[out["name"]] = out["path"]
+
+    assert plain_text.load("task-output-concat.txt") == "Hallo world Hello world1"
+
+
+def test_run_task_with_skipped_args(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    skipped_args_flow = Flow("skipped-args")
+
+    @skipped_args_flow.task()
+    def foo() -> str:
+        return "Hallo world"
+
+    @skipped_args_flow.task({"third": foo, "first": foo}, serializer=plain_text)
+    def bar(
+        first: str,
+        second: str = "-",
+        third: str = "",
+        flowctx: Optional[FlowContext] = None,
+    ) -> str:
+        assert flowctx is not None
+        return f"{first}{second}{third}{flowctx.task_id}"
+
+    for inp in skipped_args_flow.tasks[1].inputs:
+        msgpack_bin.dump("a", inp.path)
+
+    monkeypatch.setenv("FLOWMIUM_FRAMEWORK_TASK_ID", "1")
+    skipped_args_flow.run()
+
+    assert plain_text.load("task-output-bar.txt") == "a-a1"
+
+
+def test_wrapped_task_args() -> None:
+    wrapped_flow = Flow("wrapped")
+
+    def logged(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    @wrapped_flow.task()
+    def foo() -> str:
+        return "Hallo world"
+
+    @wrapped_flow.task({"input_str": foo})
+    @logged
+    def bar(input_str: str) -> str:
+        return input_str
+
+    assert [inp.arg_name for inp in wrapped_flow.tasks[1].inputs] == ["input_str"]
+
+
+def test_default_serializer_from_return_type() -> None:
+    default_serializer_flow = Flow("default-serializer")
+
+    @default_serializer_flow.task()
+    def foo() -> dict[str, list[int]]:
+        return {"numbers": [1, 2]}
+
+    @default_serializer_flow.task()
+    def bar() -> "str":
+        return "Hallo world"
+
+    @default_serializer_flow.task()
+    def baz() -> tuple[int, int]:
+        return (1, 2)
+
+    @default_serializer_flow.task()
+    def qux():  # type: ignore[no-untyped-def]
+        return {1, 2}
+
+    @default_serializer_flow.task()
+    def quux() -> list:
+        return [(1, 2)]
+
+    @default_serializer_flow.task()
+    def corge() -> list[tuple[int, int]]:
+        return [(1, 2)]
+
+    @default_serializer_flow.task()
+    def grault() -> [int]:  # type: ignore[valid-type]
+        return [1]
+
+    @default_serializer_flow.task()
+    def garply() -> Optional["list[str]"]:
+        return None
+
+    @default_serializer_flow.task()
+    def waldo() -> "typing.List[int]":
+        return [1]
+
+    @default_serializer_flow.task()
+    def fred() -> "DoesNotExist":  # type: ignore[name-defined] # noqa: F821
+        return None
+
+    assert default_serializer_flow.serializers == {
+        "foo": msgpack_bin,
+        "bar": msgpack_bin,
+        "baz": pkl,
+        "qux": pkl,
+        "quux": pkl,
+        "corge": pkl,
+        "grault": pkl,
+        "garply": msgpack_bin,
+        "waldo": msgpack_bin,
+        "fred": pkl,
+    }
+
+
+def test_flow_context_task_id_str() -> None:
+    flowctx = FlowContext(task_id=3)
+
+    assert flowctx.task_id_str == "3"
+    assert flowctx == FlowContext(3)
@@ -0,0 +1,34 @@
+import importlib
+import json
+import sys
+from typing import Iterator
+
+import pytest
+
+from flowmium import _json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_module(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[None]:
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+        yield
+        return
+
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    importlib.reload(_json)
+    yield
+
+    monkeypatch.undo()
+    importlib.reload(_json)
+
+
+@pytest.mark.usefixtures("json_module")
+def test_dumps() -> None:
+    dag = {"name": "testing", "tasks": [{"name": "foo", "depends": []}]}
+
+    assert json.loads(_json.dumps(dag)) == dag
+    assert json.loads(_json.dumps(dag, indent=True)) == dag
+    assert b"\n  " in _json.dumps(dag, indent=True)
@@ -0,0 +1,194 @@
+import dataclasses
+import io
+import math
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from flowmium.serializers import (
+    arrow,
+    json_text,
+    msgpack_bin,
+    pkl,
+    pkl_lz4,
+    pkl_oob,
+    plain_text,
+)
+
+
+class Point:
+    def __init__(self, x: int, y: int) -> None:
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Point) and (self.x, self.y) == (other.x, other.y)
+
+
+def test_serializers_are_immutable_and_hashable() -> None:
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        pkl.ext = "pickle"  # type: ignore[misc]
+
+    assert {pkl: "pkl", msgpack_bin: "msgpack"}[msgpack_bin] == "msgpack"
+    assert len({pkl, pkl, plain_text}) == 2
+
+
+def test_json_text_round_trip(tmp_path: Path) -> None:
+    path = str(tmp_path / "task-output-foo.json")
+    obj = {"nan": float("nan"), "big": 2**70, "text": "Hallo world"}
+
+    json_text.dump(obj, path)
+    loaded = json_text.load(path)
+
+    assert math.isnan(loaded.pop("nan"))
+    assert loaded == {"big": 2**70, "text": "Hallo world"}
+
+
+def test_msgpack_bin_round_trip(tmp_path: Path) -> None:
+    path = str(tmp_path / "task-output-foo.msgpack")
+    obj = {
+        "text": "Hallo world",
+        "numbers": [1, 2.5, None, True],
+        "blob": b"\x00\x01",
+        1: "int key",
+    }
+
+    msgpack_bin.dump(obj, path)
+
+    assert msgpack_bin.load(path) == obj
+
+
+def test_msgpack_bin_falls_back_to_pickle(tmp_path: Path) -> None:
+    path = str(tmp_path / "task-output-foo.msgpack")
+    obj = {
+        "tuple": (1, 2),
+        "set": {"a", "b"},
+        "ordered": OrderedDict(a=1),
+        "point": Point(1, 2),
+    }
+
+    msgpack_bin.dump(obj, path)
+    loaded = msgpack_bin.load(path)
+
+    assert loaded == obj
+    assert type(loaded["tuple"]) is tuple
+    assert type(loaded["ordered"]) is OrderedDict
+
+
+def test_plain_text_overwrites(tmp_path: Path) -> None:
+    path = str(tmp_path / "outputs" / "task-output-foo.txt")
+
+    plain_text.dump("Hallo world" * 10, path)
+    plain_text.dump(42, path)
+
+    assert plain_text.load(path) == "42"
+
+
+def test_dump_recreates_relative_dirs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for work_dir in ("a", "b"):
+        (tmp_path / work_dir).mkdir()
+        monkeypatch.chdir(tmp_path / work_dir)
+
+        plain_text.dump(work_dir, "outputs/task-output-foo.txt")
+
+        assert plain_text.load("outputs/task-output-foo.txt") == work_dir
+
+
+def test_pkl_uses_highest_protocol(tmp_path: Path) -> None:
+    path = tmp_path / "task-output-foo.pkl"
+    obj = {"point": Point(1, 2), "numbers": list(range(10))}
+
+    pkl.dump(obj, str(path))
+
+    assert path.read_bytes()[:2] == b"\x80" + bytes([pickle.HIGHEST_PROTOCOL])
+    assert pkl.load(str(path)) == obj
+
+
+def test_loads_do_not_share_the_reused_buffer(tmp_path: Path) -> None:
+    first_path = str(tmp_path / "first.pkl")
+    second_path = str(tmp_path / "second.msgpack")
+    large_path = str(tmp_path / "large.pkl")
+
+    pkl.dump({"blob": b"a" * 64, "point": Point(1, 2)}, first_path)
+    msgpack_bin.dump({"blob": b"b" * 128, "text": "Hallo world"}, second_path)
+    pkl.dump(bytearray(256 * 1024), large_path)
+
+    first = pkl.load(first_path)
+    second = msgpack_bin.load(second_path)
+
+    assert first == {"blob": b"a" * 64, "point": Point(1, 2)}
+    assert second == {"blob": b"b" * 128, "text": "Hallo world"}
+    assert pkl.load(large_path) == bytearray(256 * 1024)
+
+
+def test_load_large_files(tmp_path: Path) -> None:
+    pkl_path = str(tmp_path / "task-output-foo.pkl")
+    msgpack_path = str(tmp_path / "task-output-foo.msgpack")
+    obj = {"blob": b"flowmium" * (1 << 20), "point": Point(1, 2)}
+
+    pkl.dump(obj, pkl_path)
+    msgpack_bin.dump(obj, msgpack_path)
+
+    assert pkl.load(pkl_path) == obj
+    assert msgpack_bin.load(msgpack_path) == obj
+
+
+def test_load_funcs_accept_any_file_object() -> None:
+    obj = {"text": "Hallo world", "point": Point(1, 2)}
+
+    for serializer in (pkl, msgpack_bin):
+        output_file = io.BytesIO()
+        serializer.dump_func(obj, output_file)
+        output_file.seek(0)
+
+        assert serializer.load_func(output_file) == obj
+
+
+def test_pkl_oob_round_trip(tmp_path: Path) -> None:
+    path = str(tmp_path / "task-output-foo.pkl5")
+    obj = {"buffer": bytearray(b"flowmium" * 1024), "point": Point(1, 2)}
+
+    pkl_oob.dump(obj, path)
+    loaded = pkl_oob.load(path)
+
+    assert loaded == obj
+
+    loaded["buffer"][0] = ord("F")
+
+    assert pkl_oob.load(path) == obj
+
+
+def test_arrow_round_trip(tmp_path: Path) -> None:
+    pa = pytest.importorskip("pyarrow")
+    pd = pytest.importorskip("pandas")
+
+    path = str(tmp_path / "task-output-foo.arrow")
+    table = pa.table({"x": [1, 2, 3], "y": ["a", "b", "c"]})
+
+    arrow.dump(table, path)
+
+    assert arrow.load(path).equals(table)
+
+    data_frame = pd.DataFrame({"x": [1.5, 2.5], "y": ["a", "b"]})
+
+    arrow.dump(data_frame, path)
+
+    assert arrow.load(path).equals(data_frame)
+
+
+def test_pkl_lz4_round_trip(tmp_path: Path) -> None:
+    pytest.importorskip("lz4")
+
+    path = tmp_path / "task-output-foo.pkl.lz4"
+    text = "Hallo world" * 1024
+    obj = {"text": text, "point": Point(1, 2)}
+
+    pkl_lz4.dump(obj, str(path))
+
+    assert path.stat().st_size < len(text)
+    assert pkl_lz4.load(str(path)) == obj